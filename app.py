@@ -1,5 +1,4 @@
 import os
-import json
 import datetime
 from pprint import pprint
 
@@ -15,12 +14,14 @@ from src.user_management import login, logout
 from src.file_upload import upload_video
 from src.annotation_interface import annotation_interface
 from src.quality_dashboard import display_quality_metrics, export_metrics
+from src.insights_io import save_insights
 
 
 def list_json_files(directory="data/processed"):
     if not os.path.exists(directory):
         os.makedirs(directory)
-    return [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".json")]
+    with os.scandir(directory) as entries:
+        return [entry.path for entry in entries if entry.name.endswith(".json") and entry.is_file()]
 
 
 def save_insights_to_file(insights, base_name):
@@ -29,20 +30,16 @@ def save_insights_to_file(insights, base_name):
         os.makedirs(processed_dir)
     filename = f"{base_name}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}_cloud.json"
     json_path = os.path.join(processed_dir, filename)
-    with open(json_path, "w") as f:
-        json.dump(insights, f, indent=4)
+    save_insights(insights, json_path)
     return json_path
 
 
-def main():
-    st.title("Oscar-Ready Film Asset Annotation MVP")
-
-    # User login
-    username = login()
-    if not username:
-        st.stop()  # Stop execution if no user is logged in.
-    st.write(f"Hello, {username}! You're logged in.")
-
+@st.cache_resource(ttl=50 * 60)
+def get_vi_client():
+    """
+    Create and authenticate the Video Indexer client once instead of on every rerun.
+    Access tokens are valid for an hour, so the cached client is rebuilt before they expire.
+    """
     # Load configuration from .env file
     config = dotenv_values(".env")
     AccountName = config.get('AccountName')       # e.g., "OscarReady"
@@ -64,6 +61,20 @@ def main():
 
     # Authenticate your account (synchronous method)
     client.authenticate_async(consts)
+    return client
+
+
+def main():
+    st.title("Oscar-Ready Film Asset Annotation MVP")
+
+    # User login
+    username = login()
+    if not username:
+        st.stop()  # Stop execution if no user is logged in.
+    st.write(f"Hello, {username}! You're logged in.")
+
+    # Authenticated client, built once and shared across reruns
+    client = get_vi_client()
 
     # ------------------------------
     # Local Video Upload Flow
@@ -1,12 +1,44 @@
 import streamlit as st
-import json
 import os
+import ijson
+import orjson
+import queue
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 import pandas as pd
 import cv2
 import numpy as np
 from src.metadata_extraction import extract_keyframes as extract_keyframes_opencv
 
+# Thumbnails are shown in a three-column grid, so full-resolution frames are wasted bytes
+THUMBNAIL_WIDTH = 320
+JPEG_QUALITY = 85
+
+# libjpeg-turbo's SIMD encoder; PyTurboJPEG also needs the system library, so fall back to cv2.imwrite
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbo_jpeg = None
+
+# decord decodes with GOP-aware batch random access; fall back to OpenCV when it isn't installed
+try:
+    from decord import VideoReader, cpu
+except ImportError:
+    VideoReader = None
+
+# ASCII characters that can't appear in a thumbnails directory name; str.translate maps them all in one pass
+_SANITIZE_TABLE = str.maketrans({c: "_" for c in map(chr, range(128)) if not c.isalnum()})
+
+# One line per time string; lines that are not 'HH:MM:SS.mmm' match the empty alternative
+_TIME_PATTERN = re.compile(r"^(\d+):(\d+):(\d+)\.(\d+)$|^.*$", re.MULTILINE)
+
+@lru_cache(maxsize=4096)
 def parse_time(time_str):
     """Parse time string in format 'HH:MM:SS.mmm' to seconds."""
     try:
@@ -28,157 +60,584 @@ def format_timing(start_time, end_time):
     except:
         return "Invalid timing format"
 
-def extract_keyframes(metadata):
-    """Extract keyframes from video using Azure Video Indexer timing information."""
-    # Get video name from metadata
-    video_name = metadata.get("name")
-    if not video_name:
-        raise ValueError("Video name not found in metadata")
+def parse_times_batch(time_strs):
+    """
+    Parse a list of 'HH:MM:SS.mmm' strings to seconds in one regex pass.
+    Returns a float64 array; strings parse_time would reject become 0.
+    """
+    time_strs = [s if isinstance(s, str) else "" for s in time_strs]
+    if not time_strs:
+        return np.zeros(0)
+    
+    fields = np.array(_TIME_PATTERN.findall("\n".join(time_strs)), dtype=str).reshape(-1, 4)
+    if len(fields) != len(time_strs):
+        # A string contained a newline, so lines no longer line up with inputs
+        return np.array([parse_time(s) for s in time_strs], dtype=np.float64)
+    
+    valid = fields[:, 0] != ""
+    values = np.where(valid[:, None], fields, "0").astype(np.int64)
+    seconds = values[:, 0] * 3600 + values[:, 1] * 60 + values[:, 2] + values[:, 3] / 1000
+    return np.where(valid, seconds, 0.0)
+
+def _object_array(values):
+    """Build a 1-D object array without NumPy trying to nest list values."""
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+@dataclass
+class Intervals:
+    """Timed instances of one insight category, flattened into parallel arrays in metadata order."""
+    starts: np.ndarray
+    ends: np.ndarray
+    names: np.ndarray
+    confs: np.ndarray
+    
+    def __post_init__(self):
+        self._by_start = np.argsort(self.starts, kind="stable")
+        self._sorted_starts = self.starts[self._by_start]
+    
+    @classmethod
+    def from_pairs(cls, start_strs, end_strs, names, confs):
+        return cls(parse_times_batch(start_strs), parse_times_batch(end_strs),
+                   _object_array(names), np.array(confs, dtype=np.float64))
+    
+    def active_at(self, timestamp, until=None):
+        """
+        Indices of the instances active at `timestamp`, in metadata order. With `until`,
+        instances overlapping anywhere in [timestamp, until] are returned instead.
+        """
+        until = timestamp if until is None else until
+        candidates = self._by_start[:np.searchsorted(self._sorted_starts, until, side="right")]
+        return np.sort(candidates[self.ends[candidates] >= timestamp])
+
+@dataclass
+class Insights:
+    """Numeric view of the timed Azure insights, built once per metadata load."""
+    labels: Intervals
+    faces: Intervals
+    ocr: Intervals
+    shots: Intervals
+    transcript: Intervals
+    
+    def timestamps(self):
+        """Sorted unique start/end times of labels, transcript segments and shots."""
+        return np.unique(np.concatenate([
+            self.labels.starts, self.labels.ends,
+            self.transcript.starts, self.transcript.ends,
+            self.shots.starts, self.shots.ends
+        ]))
+
+def preprocess_insights(metadata):
+    """Walk the nested insights dict once and flatten every timed category into Intervals."""
+    video_insights = metadata.get("videos", [{}])[0].get("insights", {})
+    
+    labels = [(label, instance) for label in video_insights.get("labels", [])
+              for instance in label.get("appearances", [])]
+    faces = [(face, instance) for face in video_insights.get("faces", [])
+             for instance in face.get("instances", [])]
+    ocrs = [(ocr, instance) for ocr in video_insights.get("ocr", [])
+            for instance in ocr.get("instances", [])]
+    segments = [(segment, instance) for segment in video_insights.get("transcript", [])
+                for instance in segment.get("instances", [])]
+    shots = video_insights.get("shots", [])
+    
+    return Insights(
+        labels=Intervals.from_pairs(
+            [instance.get("startTime") for _, instance in labels],
+            [instance.get("endTime") for _, instance in labels],
+            [label.get("name") for label, _ in labels],
+            [instance.get("confidence", 0) for _, instance in labels]
+        ),
+        faces=Intervals.from_pairs(
+            [instance.get("start") for _, instance in faces],
+            [instance.get("end") for _, instance in faces],
+            [face.get("name") for face, _ in faces],
+            [instance.get("confidence", 0) for _, instance in faces]
+        ),
+        ocr=Intervals.from_pairs(
+            [instance.get("start") for _, instance in ocrs],
+            [instance.get("end") for _, instance in ocrs],
+            [ocr.get("text") for ocr, _ in ocrs],
+            [ocr.get("confidence", 0) for ocr, _ in ocrs]
+        ),
+        # Shots carry their tag lists in place of a name
+        shots=Intervals.from_pairs(
+            [shot.get("start") for shot in shots],
+            [shot.get("end") for shot in shots],
+            [shot.get("tags", []) for shot in shots],
+            [0] * len(shots)
+        ),
+        transcript=Intervals.from_pairs(
+            [instance.get("adjustedStart") for _, instance in segments],
+            [instance.get("adjustedEnd") for _, instance in segments],
+            [segment.get("text") for segment, _ in segments],
+            [segment.get("confidence", 0) for segment, _ in segments]
+        )
+    )
+
+def parse_duration(time_str):
+    """
+    Parse an insights duration like 'H:MM:SS.fffffff' to seconds, reading the fraction
+    as a decimal fraction of any length. Returns None if it can't be parsed.
+    """
+    try:
+        h, m, s = time_str.split(':')
+        return int(h) * 3600 + int(m) * 60 + float(s)
+    except (AttributeError, ValueError):
+        return None
+
+def has_reliable_frame_numbers(cap, fps, duration):
+    """
+    Check whether frame numbers can be derived from timestamps as int(t * fps).
+    Variable frame rate videos report a frame count that does not match their
+    duration, in which case frames have to be located by seeking instead.
+    """
+    frame_count = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    if fps <= 0 or frame_count <= 0:
+        return False
+    if not duration:
+        return True
+    return abs(frame_count / fps - duration) <= max(1.0, duration * 0.02)
+
+def iter_frames(cap, targets, fps, sequential=True):
+    """
+    Yield (frame_index, timestamp, frame) for every (frame_index, timestamp) target that could
+    be decoded. Targets must be sorted by timestamp.
+    With `sequential` the video is read in a single forward pass, grabbing the frames
+    between targets and only decoding the ones we need. Otherwise every frame is
+    located with a CAP_PROP_POS_FRAMES seek.
+    """
+    current = 0
+    last_frame_number, last_frame = None, None
+    for frame_index, timestamp in targets:
+        # Convert timestamp to frame number
+        frame_number = int(timestamp * fps)
+        
+        if not sequential:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ret, frame = cap.read()
+            if ret:
+                yield frame_index, timestamp, frame
+            continue
+        
+        # Several timestamps often round to the same frame
+        if frame_number == last_frame_number:
+            yield frame_index, timestamp, last_frame
+            continue
+        
+        # Skip ahead without decoding the frames in between
+        while current < frame_number:
+            if not cap.grab():
+                return
+            current += 1
+        ret, frame = cap.read()
+        if not ret:
+            return
+        current += 1
+        
+        last_frame_number, last_frame = frame_number, frame
+        yield frame_index, timestamp, frame
+
+def iter_frames_decord(reader, targets, fps, batch_size=16):
+    """
+    Same as iter_frames, using a decord VideoReader.
+    Frames are fetched with get_batch in chunks of `batch_size` unique frame numbers and
+    converted to BGR so they can be handled exactly like OpenCV frames.
+    """
+    frame_count = len(reader)
+    targets = [(frame_index, timestamp, int(timestamp * fps)) for frame_index, timestamp in targets]
+    # Frames past the end are skipped, as a failed cap.read() would
+    targets = [target for target in targets if target[2] < frame_count]
+    
+    frame_numbers = sorted({frame_number for _, _, frame_number in targets})
+    position = 0
+    for start in range(0, len(frame_numbers), batch_size):
+        batch_numbers = frame_numbers[start:start + batch_size]
+        batch = reader.get_batch(batch_numbers).asnumpy()
+        frames = {n: cv2.cvtColor(frame, cv2.COLOR_RGB2BGR) for n, frame in zip(batch_numbers, batch)}
+        while position < len(targets) and targets[position][2] in frames:
+            frame_index, timestamp, frame_number = targets[position]
+            yield frame_index, timestamp, frames[frame_number]
+            position += 1
+
+def iter_frames_threaded(frames, queue_size=8):
+    """
+    Consume a frame iterator such as iter_frames on a background thread and hand frames over
+    through a bounded queue, so the caller's JPEG encoding overlaps the next decode.
+    """
+    items = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    
+    def reader():
+        try:
+            for item in frames:
+                if stop.is_set():
+                    break
+                items.put(item)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            items.put(None)
+    
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        # Unblock the reader if we stopped early, then wait for it before the video is released
+        stop.set()
+        while thread.is_alive():
+            try:
+                items.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+    
+    if errors:
+        raise errors[0]
+
+def write_thumbnail(path, frame):
+    """Downscale a frame to THUMBNAIL_WIDTH and write it as a JPEG. Returns False if the write failed."""
+    height, width = frame.shape[:2]
+    if width > THUMBNAIL_WIDTH:
+        size = (THUMBNAIL_WIDTH, max(1, round(height * THUMBNAIL_WIDTH / width)))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    if _turbo_jpeg is not None:
+        with open(path, "wb") as f:
+            f.write(_turbo_jpeg.encode(frame, quality=JPEG_QUALITY, pixel_format=TJPF_BGR))
+        return True
+    return cv2.imwrite(path, frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _video_index(raw_videos_dir, dir_mtime):
+    """Map video names without extension to their paths; `dir_mtime` refreshes the cache when files change."""
+    with os.scandir(raw_videos_dir) as entries:
+        return {os.path.splitext(entry.name)[0]: entry.path for entry in entries
+                if entry.name.lower().endswith(('.mp4', '.mov', '.avi', '.mkv'))}
+
+def format_seconds(timestamp):
+    """Format seconds as 'HH:MM:SS.mmm'."""
+    hours = int(timestamp // 3600)
+    minutes = int((timestamp % 3600) // 60)
+    seconds = int(timestamp % 60)
+    milliseconds = int((timestamp * 1000) % 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+def build_keyframe_data(frame_index, start, end, thumbnail_path, insights):
+    """
+    Build the keyframe dict for a frame covering the timestamps start..end from the numeric insights.
+    Everything active anywhere in that span is attached to the keyframe.
+    """
+    # Create keyframe data
+    keyframe_data = {
+        "frame_index": frame_index,
+        "keyframe_path": thumbnail_path,
+        "start_time": format_seconds(start),
+        "end_time": format_seconds(end),
+        "shot_tags": [],
+        "labels": [],
+        "faces": [],
+        "ocr_text": []
+    }
+    
+    # Add labels, faces, OCR text and shot tags that are active during the frame
+    for i in insights.labels.active_at(start, end):
+        keyframe_data["labels"].append({
+            "name": insights.labels.names[i],
+            "confidence": float(insights.labels.confs[i])
+        })
+    for i in insights.faces.active_at(start, end):
+        keyframe_data["faces"].append({
+            "name": insights.faces.names[i],
+            "confidence": float(insights.faces.confs[i])
+        })
+    for i in insights.ocr.active_at(start, end):
+        keyframe_data["ocr_text"].append({
+            "text": insights.ocr.names[i],
+            "confidence": float(insights.ocr.confs[i])
+        })
+    for i in insights.shots.active_at(start, end):
+        keyframe_data["shot_tags"].extend(insights.shots.names[i])
+    
+    return keyframe_data
+
+def is_thumbnail_fresh(thumbnail_path, metadata_mtime=None):
+    """Whether a thumbnail exists and, if the metadata mtime is known, was written after it."""
+    try:
+        thumbnail_mtime = os.path.getmtime(thumbnail_path)
+    except OSError:
+        return False
+    return metadata_mtime is None or thumbnail_mtime > metadata_mtime
+
+def sanitize_name(name):
+    """Replace every character that isn't alphanumeric with an underscore."""
+    sanitized = name.translate(_SANITIZE_TABLE)
+    if sanitized.isascii():
+        return sanitized
+    # Curly quotes, dashes, emoji and the like are outside the table
+    return "".join(c if c.isalnum() else "_" for c in sanitized)
+
+def video_base_name(video_name):
+    """Get the base video name without the upload timestamp suffix."""
+    return video_name.partition('_')[0]
+
+def extract_keyframes(metadata, metadata_mtime=None, base_name=None, metadata_name=None):
+    """
+    Extract keyframes from video using Azure Video Indexer timing information.
+    Thumbnails already written after `metadata_mtime` are reused without decoding the video.
+    `base_name` can be passed in by callers that have already derived it from the video name.
+    `metadata_name` names the metadata file the thumbnails belong to; frame numbers point at
+    different timestamps in each insights file, so every file gets its own thumbnails directory.
+    """
+    if base_name is None:
+        # Get video name from metadata
+        video_name = metadata.get("name")
+        if not video_name:
+            raise ValueError("Video name not found in metadata")
+        base_name = video_base_name(video_name)
     
-    # Extract base video name (remove timestamp) and sanitize it
-    base_name = video_name.split('_')[0]
     # Replace special characters with underscores
-    sanitized_name = "".join(c if c.isalnum() else "_" for c in base_name)
+    sanitized_name = sanitize_name(base_name)
     
     # Look for video file in raw_videos directory
     raw_videos_dir = os.path.join("data", "raw_videos")
     if not os.path.exists(raw_videos_dir):
         raise ValueError(f"Raw videos directory not found: {raw_videos_dir}")
     
-    # Find the video file that matches the base name
-    video_files = [f for f in os.listdir(raw_videos_dir) if f.startswith(base_name) and f.endswith(('.mp4', '.mov', '.avi', '.mkv'))]
-    if not video_files:
+    # Find the video file that matches the base name, falling back to the first prefix match
+    video_index = _video_index(raw_videos_dir, os.path.getmtime(raw_videos_dir))
+    video_path = video_index.get(base_name)
+    if video_path is None:
+        video_path = next((path for name, path in video_index.items() if name.startswith(base_name)), None)
+    if video_path is None:
         raise ValueError(f"No video file found in {raw_videos_dir} that matches the base name: {base_name}")
     
-    # Use the first matching video file
-    video_path = os.path.join(raw_videos_dir, video_files[0])
-    
     # Get video insights from Azure metadata
     video_insights = metadata.get("videos", [{}])[0].get("insights", {})
     
     # Create thumbnails directory if it doesn't exist
     thumbnails_dir = os.path.join("thumbnails", sanitized_name)
+    if metadata_name is not None:
+        thumbnails_dir = os.path.join(thumbnails_dir, sanitize_name(metadata_name))
     os.makedirs(thumbnails_dir, exist_ok=True)
     
-    # Collect all significant timestamps from Azure insights
-    timestamps = set()
+    # Flatten the timed insights once; lookups per timestamp then only touch overlapping intervals
+    insights = preprocess_insights(metadata)
     
-    # Add timestamps from labels
-    for label in video_insights.get("labels", []):
-        for instance in label.get("appearances", []):
-            timestamps.add(parse_time(instance.get("startTime")))
-            timestamps.add(parse_time(instance.get("endTime")))
+    # Collect all significant timestamps from labels, transcript and shots, sorted and deduplicated
+    timestamps = insights.timestamps().tolist()
     
-    # Add timestamps from transcript
-    for segment in video_insights.get("transcript", []):
-        for instance in segment.get("instances", []):
-            timestamps.add(parse_time(instance.get("adjustedStart")))
-            timestamps.add(parse_time(instance.get("adjustedEnd")))
+    # Timestamps a few milliseconds apart land on the same frame; decode each frame once.
+    # Each bucket keeps the index of its first timestamp, so thumbnail names and saved
+    # annotations stay attached to the same frames.
+    fps = cached_fps(thumbnails_dir, video_path, metadata_mtime)
+    buckets = {}
+    for frame_index, timestamp in enumerate(timestamps):
+        frame_number = int(timestamp * fps) if fps > 0 else frame_index
+        if frame_number in buckets:
+            buckets[frame_number][2] = timestamp
+        else:
+            buckets[frame_number] = [frame_index, timestamp, timestamp]
+    frames = sorted(buckets.values(), key=lambda bucket: bucket[1])
     
-    # Add timestamps from shots (if available)
-    for shot in video_insights.get("shots", []):
-        timestamps.add(parse_time(shot.get("start")))
-        timestamps.add(parse_time(shot.get("end")))
+    # Thumbnail names are stable per timestamp index, so only decode the ones missing on disk
+    thumbnail_paths = {frame_index: os.path.abspath(os.path.join(thumbnails_dir, f"frame_{frame_index}.jpg"))
+                       for frame_index, _, _ in frames}
+    available = {frame_index for frame_index, path in thumbnail_paths.items()
+                 if is_thumbnail_fresh(path, metadata_mtime)}
+    targets = [(frame_index, start) for frame_index, start, _ in frames if frame_index not in available]
     
-    # Sort timestamps
-    timestamps = sorted(list(timestamps))
+    if targets:
+        available.update(decode_thumbnails(video_path, targets, thumbnail_paths, video_insights))
     
-    # Open video file
+    return [build_keyframe_data(frame_index, start, end, thumbnail_paths[frame_index], insights)
+            for frame_index, start, end in frames if frame_index in available]
+
+def probe_fps(video_path):
+    """Read the nominal frame rate of a video; 0 if it can't be determined."""
     cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"Could not open video file: {video_path}")
-    
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    formatted_keyframes = []
+    try:
+        return cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0
+    finally:
+        cap.release()
+
+def cached_fps(thumbnails_dir, video_path, metadata_mtime=None):
+    """
+    Frame rate of the video, stored next to its thumbnails so that reusing fresh
+    thumbnails doesn't have to open the video just to bucket timestamps.
+    """
+    fps_path = os.path.join(thumbnails_dir, "fps.txt")
+    if is_thumbnail_fresh(fps_path, metadata_mtime):
+        try:
+            with open(fps_path) as f:
+                return float(f.read())
+        except (OSError, ValueError):
+            pass
     
-    # Extract frame at each significant timestamp
-    for frame_index, timestamp in enumerate(timestamps):
-        # Convert timestamp to frame number
-        frame_number = int(timestamp * fps)
-        
-        # Set frame position
-        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-        ret, frame = cap.read()
+    fps = probe_fps(video_path)
+    with open(fps_path, "w") as f:
+        f.write(repr(fps))
+    return fps
+
+def decode_thumbnails(video_path, targets, thumbnail_paths, video_insights):
+    """
+    Decode the frame for each (frame_index, timestamp) target and write it to thumbnail_paths[frame_index].
+    Returns the frame indices whose thumbnails were written.
+    """
+    # Open video file
+    cap = None
+    if VideoReader is not None:
+        try:
+            reader = VideoReader(video_path, ctx=cpu(0))
+        except Exception as e:
+            raise ValueError(f"Could not open video file: {video_path}") from e
+        fps = reader.get_avg_fps()
+        frames = iter_frames_decord(reader, targets, fps)
+    else:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
         
-        if ret:
-            # Save frame as thumbnail with absolute path
-            thumbnail_path = os.path.abspath(os.path.join(thumbnails_dir, f"frame_{frame_index}.jpg"))
-            cv2.imwrite(thumbnail_path, frame)
-            
-            # Format time string
-            hours = int(timestamp // 3600)
-            minutes = int((timestamp % 3600) // 60)
-            seconds = int(timestamp % 60)
-            milliseconds = int((timestamp * 1000) % 1000)
-            time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
-            
-            # Create keyframe data
-            keyframe_data = {
-                "frame_index": frame_index,
-                "keyframe_path": thumbnail_path,
-                "start_time": time_str,
-                "end_time": time_str,
-                "shot_tags": [],
-                "labels": [],
-                "faces": [],
-                "ocr_text": []
-            }
-            
-            # Add labels that are active at this timestamp
-            for label in video_insights.get("labels", []):
-                for instance in label.get("appearances", []):
-                    if (parse_time(instance.get("startTime", "0:00:00")) <= timestamp and
-                        parse_time(instance.get("endTime", "0:00:00")) >= timestamp):
-                        keyframe_data["labels"].append({
-                            "name": label.get("name"),
-                            "confidence": instance.get("confidence", 0)
-                        })
-            
-            # Add faces that are visible at this timestamp
-            for face in video_insights.get("faces", []):
-                for instance in face.get("instances", []):
-                    if (parse_time(instance.get("start", "0:00:00")) <= timestamp and
-                        parse_time(instance.get("end", "0:00:00")) >= timestamp):
-                        keyframe_data["faces"].append({
-                            "name": face.get("name"),
-                            "confidence": instance.get("confidence", 0)
-                        })
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        sequential = has_reliable_frame_numbers(cap, fps, parse_duration(video_insights.get("duration")))
+        frames = iter_frames(cap, targets, fps, sequential)
+    decoded = []
+    
+    # Resizing and JPEG encoding release the GIL, so thumbnails are written on a thread pool.
+    # Only a bounded number of frames is kept in flight to cap memory on long videos.
+    workers = os.cpu_count() or 4
+    pending = deque()
+    decoded_frames = iter_frames_threaded(frames)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Extract frame at each significant timestamp
+            for frame_index, timestamp, frame in decoded_frames:
+                pending.append((frame_index, pool.submit(write_thumbnail, thumbnail_paths[frame_index], frame)))
+                if len(pending) > 2 * workers:
+                    frame_index, future = pending.popleft()
+                    if future.result():
+                        decoded.append(frame_index)
             
-            # Add OCR text visible at this timestamp
-            for ocr in video_insights.get("ocr", []):
-                for instance in ocr.get("instances", []):
-                    if (parse_time(instance.get("start", "0:00:00")) <= timestamp and
-                        parse_time(instance.get("end", "0:00:00")) >= timestamp):
-                        keyframe_data["ocr_text"].append({
-                            "text": ocr.get("text"),
-                            "confidence": ocr.get("confidence", 0)
-                        })
+            # Wait for the remaining thumbnails before returning their paths
+            for frame_index, future in pending:
+                if future.result():
+                    decoded.append(frame_index)
+    finally:
+        # Stop the reader thread before releasing the capture it reads from
+        decoded_frames.close()
+        if cap is not None:
+            cap.release()
+    return decoded
+
+# Insights sections each consumer actually reads; everything else in the file is skipped
+KEYFRAME_SECTIONS = ("duration", "labels", "faces", "ocr", "shots", "transcript")
+DISPLAY_SECTIONS = ("duration", "language", "sourceLanguages", "transcript", "labels", "faces", "ocr",
+                    "sentiments", "emotions", "audioEffects", "topics", "brands", "namedPeople", "namedLocations")
+
+def load_metadata(metadata_file, sections=()):
+    """
+    Stream a Video Indexer metadata JSON file, building only the top-level name and the
+    requested insights sections of the first video. Returns a dict with the same shape
+    as the full metadata, so callers can keep using metadata["videos"][0]["insights"].
+    """
+    wanted = {f"videos.item.insights.{section}": section for section in sections}
+    name = None
+    insights = {}
+    # Section being built from the events between its start and end, if any
+    builder, section = None, None
+    depth = 0
+    with open(metadata_file, "rb") as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            # Feed events to the builder until the section it started on is closed
+            if builder is not None:
+                builder.event(event, value)
+                if event in ("start_map", "start_array"):
+                    depth += 1
+                elif event in ("end_map", "end_array"):
+                    depth -= 1
+                if depth == 0:
+                    insights[section] = builder.value
+                    builder, section = None, None
+                continue
             
-            # Add shot tags from the current shot
-            for shot in video_insights.get("shots", []):
-                if (parse_time(shot.get("start", "0:00:00")) <= timestamp and
-                    parse_time(shot.get("end", "0:00:00")) >= timestamp):
-                    keyframe_data["shot_tags"].extend(shot.get("tags", []))
+            if prefix == "name" and event == "string":
+                name = value
+            elif prefix in wanted and event != "map_key" and wanted[prefix] not in insights:
+                if event in ("start_map", "start_array"):
+                    builder, section = ijson.ObjectBuilder(), wanted[prefix]
+                    builder.event(event, value)
+                    depth = 1
+                else:
+                    insights[wanted[prefix]] = value
             
-            formatted_keyframes.append(keyframe_data)
+            if name is not None and len(insights) == len(wanted):
+                break
     
-    cap.release()
-    return formatted_keyframes
+    return {"name": name, "videos": [{"insights": insights}]}
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _extract_keyframes_cached(metadata_file, mtime, base_name=None):
+    """Run extract_keyframes once per version of the metadata file; `mtime` only keys the cache."""
+    metadata_name = os.path.splitext(os.path.basename(metadata_file))[0]
+    return extract_keyframes(load_metadata(metadata_file, KEYFRAME_SECTIONS), mtime, base_name, metadata_name)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _format_insights_cached(metadata_file, mtime):
+    """Run format_insights_for_display once per version of the metadata file; `mtime` only keys the cache."""
+    return format_insights_for_display(load_metadata(metadata_file, DISPLAY_SECTIONS))
 
 def get_latest_metadata_file(base_name):
     """Get the most recent metadata file for a given video."""
     processed_dir = os.path.join("data", "processed")
-    metadata_files = [f for f in os.listdir(processed_dir) 
-                     if f.startswith(base_name) and f.endswith("_cloud.json")]
-    if not metadata_files:
-        return None
+    return _latest_metadata_file_cached(base_name, processed_dir, os.path.getmtime(processed_dir))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _latest_metadata_file_cached(base_name, processed_dir, dir_mtime):
+    """Find the newest metadata file; `dir_mtime` changes whenever files are added or removed."""
+    # One scan and one stat per matching entry, keeping only the newest file seen so far
+    latest_path, latest_ctime = None, -1
+    with os.scandir(processed_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith(base_name) and entry.name.endswith("_cloud.json") and entry.is_file():
+                ctime = entry.stat().st_ctime
+                if ctime > latest_ctime:
+                    latest_path, latest_ctime = entry.path, ctime
+    return latest_path
+
+def _percent(value):
+    return f"{value * 100:.1f}%"
+
+def _timing(instance, start_key="startTime", end_key="endTime"):
+    return f"{instance.get(start_key, '')} - {instance.get(end_key, '')}"
+
+def _flatten(items, instances_key, columns):
+    """
+    Flatten one insights category into a DataFrame with one row per timed instance.
+    `columns` maps column names to functions of (item, instance). Without `instances_key`
+    there is one row per item, paired with its first instance.
+    """
+    if instances_key is None:
+        pairs = ((item, (item.get("instances") or [{}])[0]) for item in items)
+    else:
+        pairs = ((item, instance) for item in items for instance in item.get(instances_key, []))
     
-    # Sort by creation time, newest first
-    metadata_files.sort(key=lambda x: os.path.getctime(os.path.join(processed_dir, x)), reverse=True)
-    return os.path.join(processed_dir, metadata_files[0])
+    data = {name: [] for name in columns}
+    for item, instance in pairs:
+        for name, get in columns.items():
+            data[name].append(get(item, instance))
+    return pd.DataFrame(data)
 
 def format_insights_for_display(metadata):
-    """Format video insights into a more readable structure."""
+    """
+    Format video insights into a more readable structure.
+    Every section except "Basic Information" is a DataFrame.
+    """
     insights = metadata.get("videos", [{}])[0].get("insights", {})
     
     formatted_insights = {
@@ -188,112 +647,101 @@ def format_insights_for_display(metadata):
             "Language": insights.get("language", "Unknown"),
             "Source Languages": ", ".join(insights.get("sourceLanguages", [])),
         },
-        "Transcript": [
-            {
-                "Text": segment.get("text", ""),
-                "Speaker": f"Speaker {segment.get('speakerId', 'Unknown')}",
-                "Confidence": f"{segment.get('confidence', 0) * 100:.1f}%",
-                "Timing": f"{segment.get('instances', [{}])[0].get('adjustedStart', '')} - {segment.get('instances', [{}])[0].get('adjustedEnd', '')}"
-            }
-            for segment in insights.get("transcript", [])
-        ],
-        "Labels": [
-            {
-                "Name": label.get("name", ""),
-                "Confidence": f"{instance.get('confidence', 0) * 100:.1f}%",
-                "Timing": f"{instance.get('startTime', '')} - {instance.get('endTime', '')}"
-            }
-            for label in insights.get("labels", [])
-            for instance in label.get("appearances", [])
-        ],
-        "Faces": [
-            {
-                "Name": face.get("name", "Unknown"),
-                "Confidence": f"{instance.get('confidence', 0) * 100:.1f}%",
-                "Timing": f"{instance.get('start', '')} - {instance.get('end', '')}"
-            }
-            for face in insights.get("faces", [])
-            for instance in face.get("instances", [])
-        ],
-        "OCR Text": [
-            {
-                "Text": ocr.get("text", ""),
-                "Confidence": f"{ocr.get('confidence', 0) * 100:.1f}%",
-                "Timing": f"{instance.get('start', '')} - {instance.get('end', '')}"
-            }
-            for ocr in insights.get("ocr", [])
-            for instance in ocr.get("instances", [])
-        ],
-        "Sentiments": [
-            {
-                "Sentiment": sentiment.get("sentimentKey", ""),
-                "Duration Ratio": f"{sentiment.get('seenDurationRatio', 0) * 100:.1f}%",
-                "Timing": f"{instance.get('startTime', '')} - {instance.get('endTime', '')}"
-            }
-            for sentiment in insights.get("sentiments", [])
-            for instance in sentiment.get("appearances", [])
-        ],
-        "Emotions": [
-            {
-                "Emotion": emotion.get("type", ""),
-                "Duration Ratio": f"{emotion.get('seenDurationRatio', 0) * 100:.1f}%",
-                "Timing": f"{instance.get('startTime', '')} - {instance.get('endTime', '')}"
-            }
-            for emotion in insights.get("emotions", [])
-            for instance in emotion.get("appearances", [])
-        ],
-        "Audio Effects": [
-            {
-                "Effect": effect.get("audioEffectKey", ""),
-                "Duration Ratio": f"{effect.get('seenDurationRatio', 0) * 100:.1f}%",
-                "Timing": f"{instance.get('startTime', '')} - {instance.get('endTime', '')}"
-            }
-            for effect in insights.get("audioEffects", [])
-            for instance in effect.get("appearances", [])
-        ],
-        "Topics": [
-            {
-                "Topic": topic.get("name", ""),
-                "Confidence": f"{topic.get('confidence', 0) * 100:.1f}%",
-                "Timing": f"{instance.get('startTime', '')} - {instance.get('endTime', '')}"
-            }
-            for topic in insights.get("topics", [])
-            for instance in topic.get("appearances", [])
-        ],
-        "Brands": [
-            {
-                "Brand": brand.get("name", ""),
-                "Confidence": f"{brand.get('confidence', 0) * 100:.1f}%",
-                "Description": brand.get("description", ""),
-                "Timing": f"{instance.get('startTime', '')} - {instance.get('endTime', '')}"
-            }
-            for brand in insights.get("brands", [])
-            for instance in brand.get("appearances", [])
-        ],
-        "Named People": [
-            {
-                "Name": person.get("name", ""),
-                "Confidence": f"{person.get('confidence', 0) * 100:.1f}%",
-                "Description": person.get("description", ""),
-                "Timing": f"{instance.get('startTime', '')} - {instance.get('endTime', '')}"
-            }
-            for person in insights.get("namedPeople", [])
-            for instance in person.get("appearances", [])
-        ],
-        "Named Locations": [
-            {
-                "Location": location.get("name", ""),
-                "Confidence": f"{location.get('confidence', 0) * 100:.1f}%",
-                "Description": location.get("description", ""),
-                "Timing": f"{instance.get('startTime', '')} - {instance.get('endTime', '')}"
-            }
-            for location in insights.get("namedLocations", [])
-            for instance in location.get("appearances", [])
-        ]
+        "Transcript": _flatten(insights.get("transcript", []), None, {
+            "Text": lambda segment, instance: segment.get("text", ""),
+            "Speaker": lambda segment, instance: f"Speaker {segment.get('speakerId', 'Unknown')}",
+            "Confidence": lambda segment, instance: _percent(segment.get("confidence", 0)),
+            "Timing": lambda segment, instance: _timing(instance, "adjustedStart", "adjustedEnd")
+        }),
+        "Labels": _flatten(insights.get("labels", []), "appearances", {
+            "Name": lambda label, instance: label.get("name", ""),
+            "Confidence": lambda label, instance: _percent(instance.get("confidence", 0)),
+            "Timing": lambda label, instance: _timing(instance)
+        }),
+        "Faces": _flatten(insights.get("faces", []), "instances", {
+            "Name": lambda face, instance: face.get("name", "Unknown"),
+            "Confidence": lambda face, instance: _percent(instance.get("confidence", 0)),
+            "Timing": lambda face, instance: _timing(instance, "start", "end")
+        }),
+        "OCR Text": _flatten(insights.get("ocr", []), "instances", {
+            "Text": lambda ocr, instance: ocr.get("text", ""),
+            "Confidence": lambda ocr, instance: _percent(ocr.get("confidence", 0)),
+            "Timing": lambda ocr, instance: _timing(instance, "start", "end")
+        }),
+        "Sentiments": _flatten(insights.get("sentiments", []), "appearances", {
+            "Sentiment": lambda sentiment, instance: sentiment.get("sentimentKey", ""),
+            "Duration Ratio": lambda sentiment, instance: _percent(sentiment.get("seenDurationRatio", 0)),
+            "Timing": lambda sentiment, instance: _timing(instance)
+        }),
+        "Emotions": _flatten(insights.get("emotions", []), "appearances", {
+            "Emotion": lambda emotion, instance: emotion.get("type", ""),
+            "Duration Ratio": lambda emotion, instance: _percent(emotion.get("seenDurationRatio", 0)),
+            "Timing": lambda emotion, instance: _timing(instance)
+        }),
+        "Audio Effects": _flatten(insights.get("audioEffects", []), "appearances", {
+            "Effect": lambda effect, instance: effect.get("audioEffectKey", ""),
+            "Duration Ratio": lambda effect, instance: _percent(effect.get("seenDurationRatio", 0)),
+            "Timing": lambda effect, instance: _timing(instance)
+        }),
+        "Topics": _flatten(insights.get("topics", []), "appearances", {
+            "Topic": lambda topic, instance: topic.get("name", ""),
+            "Confidence": lambda topic, instance: _percent(topic.get("confidence", 0)),
+            "Timing": lambda topic, instance: _timing(instance)
+        }),
+        "Brands": _flatten(insights.get("brands", []), "appearances", {
+            "Brand": lambda brand, instance: brand.get("name", ""),
+            "Confidence": lambda brand, instance: _percent(brand.get("confidence", 0)),
+            "Description": lambda brand, instance: brand.get("description", ""),
+            "Timing": lambda brand, instance: _timing(instance)
+        }),
+        "Named People": _flatten(insights.get("namedPeople", []), "appearances", {
+            "Name": lambda person, instance: person.get("name", ""),
+            "Confidence": lambda person, instance: _percent(person.get("confidence", 0)),
+            "Description": lambda person, instance: person.get("description", ""),
+            "Timing": lambda person, instance: _timing(instance)
+        }),
+        "Named Locations": _flatten(insights.get("namedLocations", []), "appearances", {
+            "Location": lambda location, instance: location.get("name", ""),
+            "Confidence": lambda location, instance: _percent(location.get("confidence", 0)),
+            "Description": lambda location, instance: location.get("description", ""),
+            "Timing": lambda location, instance: _timing(instance)
+        })
     }
     
     return formatted_insights
 
+def build_summary_columns(keyframes):
+    """
+    Precompute the per-keyframe columns shared by the annotation summary and CSV export.
+    Returned as a dict of lists so pandas can build DataFrames column by column.
+    """
+    columns = {"Frame": [], "Start Time": [], "End Time": [], "Timing": [],
+               "Labels": [], "Faces": [], "OCR Text": [], "Shot Tags": []}
+    for kf in keyframes:
+        columns["Frame"].append(kf.get("frame_index"))
+        columns["Start Time"].append(kf.get("start_time"))
+        columns["End Time"].append(kf.get("end_time"))
+        columns["Timing"].append(format_timing(kf.get("start_time"), kf.get("end_time")))
+        columns["Labels"].append(", ".join([l["name"] for l in kf.get("labels", [])]))
+        columns["Faces"].append(", ".join([f["name"] for f in kf.get("faces", [])]))
+        columns["OCR Text"].append(" ".join([t["text"] for t in kf.get("ocr_text", [])]))
+        columns["Shot Tags"].append(", ".join(kf.get("shot_tags", [])))
+    return columns
+
+def mark_annotation_dirty(frame_idx):
+    """on_change callback for annotation text areas: remember which frame needs saving."""
+    st.session_state.has_unsaved_changes = True
+    st.session_state.dirty_annotations.add(str(frame_idx))
+
+def save_json_atomic(path, data):
+    """Write JSON to a temporary file next to `path` and atomically move it into place."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
 def annotation_interface(metadata_file):
     """
     Displays keyframes with their metadata and allows users to add or edit annotations.
@@ -304,19 +752,32 @@ def annotation_interface(metadata_file):
         st.session_state.has_unsaved_changes = False
     if "annotations" not in st.session_state:
         st.session_state.annotations = {}
+    if "dirty_annotations" not in st.session_state:
+        st.session_state.dirty_annotations = set()
 
     try:
         # Ensure processed directory exists
         processed_dir = os.path.join("data", "processed")
         os.makedirs(processed_dir, exist_ok=True)
 
-        with open(metadata_file, "r") as f:
-            metadata = json.load(f)
-        keyframes = extract_keyframes(metadata)
+        # Only the name is needed here; keyframes and insights load their own sections
+        metadata = load_metadata(metadata_file)
+        metadata_mtime = os.path.getmtime(metadata_file)
         
         # Get base video name for consistent annotations file path
         video_name = metadata.get("name", "")
-        base_name = video_name.split('_')[0]  # Get base name without timestamp
+        if not video_name:
+            raise ValueError("Video name not found in metadata")
+        base_name = video_base_name(video_name)  # Get base name without timestamp
+        
+        keyframes = _extract_keyframes_cached(metadata_file, metadata_mtime, base_name)
+        
+        # Keyframe columns only change with the metadata file, so build them once per version
+        summary_key = (metadata_file, metadata_mtime)
+        if st.session_state.get("summary_cols_key") != summary_key:
+            st.session_state.summary_cols = build_summary_columns(keyframes)
+            st.session_state.summary_cols_key = summary_key
+        summary_cols = st.session_state.summary_cols
         
         # Get the most recent metadata file
         latest_metadata = get_latest_metadata_file(base_name)
@@ -328,18 +789,20 @@ def annotation_interface(metadata_file):
         saved_annotations = {}
         if os.path.exists(annotations_file):
             try:
-                with open(annotations_file, "r") as f:
-                    saved_annotations = json.load(f)
+                with open(annotations_file, "rb") as f:
+                    saved_annotations = orjson.loads(f.read())
                 st.success(f"Loaded existing annotations from {annotations_file}")
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 st.warning("Annotations file was corrupted. Starting fresh.")
                 saved_annotations = {}
             except Exception as e:
                 st.warning(f"Could not load annotations: {str(e)}")
                 saved_annotations = {}
         
-        # Load annotations into keyframes and session state
+        # Load annotations into keyframes and session state, keeping unsaved edits
         for frame_idx, annotation in saved_annotations.items():
+            if str(frame_idx) in st.session_state.dirty_annotations:
+                continue
             for kf in keyframes:
                 if str(kf["frame_index"]) == str(frame_idx):
                     kf["annotation"] = annotation
@@ -362,8 +825,11 @@ def annotation_interface(metadata_file):
         # Add download buttons for insights and metadata
         col1, col2 = st.columns(2)
         with col1:
-            formatted_insights = format_insights_for_display(metadata)
-            insights_json = json.dumps(formatted_insights, indent=2)
+            formatted_insights = _format_insights_cached(metadata_file, metadata_mtime)
+            insights_json = orjson.dumps({
+                section: rows.to_dict("records") if isinstance(rows, pd.DataFrame) else rows
+                for section, rows in formatted_insights.items()
+            }, option=orjson.OPT_INDENT_2)
             st.download_button(
                 label="Download Formatted Insights",
                 data=insights_json,
@@ -371,9 +837,12 @@ def annotation_interface(metadata_file):
                 mime="application/json"
             )
         with col2:
+            # Serve the file as stored instead of re-serialising the parsed dict
+            with open(metadata_file, "rb") as f:
+                raw_metadata = f.read()
             st.download_button(
                 label="Download Raw Metadata",
-                data=json.dumps(metadata, indent=2),
+                data=raw_metadata,
                 file_name=f"{base_name}_raw_metadata.json",
                 mime="application/json"
             )
@@ -383,66 +852,13 @@ def annotation_interface(metadata_file):
         for key, value in formatted_insights["Basic Information"].items():
             st.text(f"{key}: {value}")
         
-        # Display transcript
-        st.subheader("Transcript")
-        for segment in formatted_insights["Transcript"]:
-            st.text(f"[{segment['Timing']}] {segment['Speaker']} ({segment['Confidence']}): {segment['Text']}")
-        
-        # Display labels
-        st.subheader("Labels")
-        for label in formatted_insights["Labels"]:
-            st.text(f"[{label['Timing']}] {label['Name']} ({label['Confidence']})")
-        
-        # Display faces
-        st.subheader("Faces")
-        for face in formatted_insights["Faces"]:
-            st.text(f"[{face['Timing']}] {face['Name']} ({face['Confidence']})")
-        
-        # Display OCR text
-        st.subheader("OCR Text")
-        for ocr in formatted_insights["OCR Text"]:
-            st.text(f"[{ocr['Timing']}] {ocr['Text']} ({ocr['Confidence']})")
-        
-        # Display sentiments
-        st.subheader("Sentiments")
-        for sentiment in formatted_insights["Sentiments"]:
-            st.text(f"[{sentiment['Timing']}] {sentiment['Sentiment']} ({sentiment['Duration Ratio']})")
-        
-        # Display emotions
-        st.subheader("Emotions")
-        for emotion in formatted_insights["Emotions"]:
-            st.text(f"[{emotion['Timing']}] {emotion['Emotion']} ({emotion['Duration Ratio']})")
-        
-        # Display audio effects
-        st.subheader("Audio Effects")
-        for effect in formatted_insights["Audio Effects"]:
-            st.text(f"[{effect['Timing']}] {effect['Effect']} ({effect['Duration Ratio']})")
-        
-        # Display topics
-        st.subheader("Topics")
-        for topic in formatted_insights["Topics"]:
-            st.text(f"[{topic['Timing']}] {topic['Topic']} ({topic['Confidence']})")
-        
-        # Display brands
-        st.subheader("Brands")
-        for brand in formatted_insights["Brands"]:
-            st.text(f"[{brand['Timing']}] {brand['Brand']} ({brand['Confidence']})")
-            if brand["Description"]:
-                st.text(f"Description: {brand['Description']}")
-        
-        # Display named people
-        st.subheader("Named People")
-        for person in formatted_insights["Named People"]:
-            st.text(f"[{person['Timing']}] {person['Name']} ({person['Confidence']})")
-            if person["Description"]:
-                st.text(f"Description: {person['Description']}")
-        
-        # Display named locations
-        st.subheader("Named Locations")
-        for location in formatted_insights["Named Locations"]:
-            st.text(f"[{location['Timing']}] {location['Location']} ({location['Confidence']})")
-            if location["Description"]:
-                st.text(f"Description: {location['Description']}")
+        # Display each section as a single table rather than one text element per row
+        for section, rows in formatted_insights.items():
+            if section == "Basic Information":
+                continue
+            st.subheader(section)
+            if not rows.empty:
+                st.dataframe(rows, use_container_width=True, hide_index=True)
 
     # Display keyframes in a grid
     st.header("Keyframes")
@@ -453,21 +869,19 @@ def annotation_interface(metadata_file):
     with col1:
         if st.button("Save Annotations", type="primary"):
             try:
-                # Create annotations dictionary from session state
-                annotations = {}
-                text_area_keys = [k for k in st.session_state.keys() if k.startswith("annot_")]
-                
-                for key in text_area_keys:
-                    frame_idx = key.split("_")[1]
-                    annotation = st.session_state[key]
+                # Merge only the edited annotations into what is already saved
+                annotations = dict(saved_annotations)
+                for frame_idx in st.session_state.dirty_annotations:
+                    annotation = st.session_state.get(f"annot_{frame_idx}", "")
                     if annotation and annotation.strip():
                         annotations[frame_idx] = annotation
+                    else:
+                        annotations.pop(frame_idx, None)
                 
                 annotations_file = os.path.join(processed_dir, f"{base_name}_annotations.json")
+                save_json_atomic(annotations_file, annotations)
                 
-                with open(annotations_file, "w") as f:
-                    json.dump(annotations, f, indent=4)
-                
+                st.session_state.dirty_annotations.clear()
                 st.session_state.has_unsaved_changes = False
                 st.success(f"Annotations saved successfully to {annotations_file}!")
                 
@@ -475,27 +889,12 @@ def annotation_interface(metadata_file):
                 st.error(f"Failed to save annotations: {e}")
     
     with col2:
-        if st.button("Export Annotations"):
-            try:
-                annotations_data = []
-                for keyframe in keyframes:
-                    annotations_data.append({
-                        "Frame Index": keyframe.get("frame_index"),
-                        "Annotation": keyframe.get("annotation", ""),
-                        "Start Time": keyframe.get("start_time"),
-                        "End Time": keyframe.get("end_time"),
-                        "Labels": ", ".join([l["name"] for l in keyframe.get("labels", [])]),
-                        "Faces": ", ".join([f["name"] for f in keyframe.get("faces", [])]),
-                        "OCR Text": " ".join([t["text"] for t in keyframe.get("ocr_text", [])])
-                    })
-                df = pd.DataFrame(annotations_data)
-                
-                export_path = os.path.join("data", "processed", f"{base_name}_annotations.csv")
-                df.to_csv(export_path, index=False)
-                st.success(f"Annotations exported to {export_path}")
-            except Exception as e:
-                st.error(f"Failed to export annotations: {e}")
+        # The export runs after the grid, once the current annotations have been collected
+        export_requested = st.button("Export Annotations")
+        export_status = st.empty()
 
+    # Render the grid and collect the annotation column in the same pass
+    annotation_column = []
     num_columns = 3
     for i in range(0, len(keyframes), num_columns):
         cols = st.columns(num_columns)
@@ -516,27 +915,23 @@ def annotation_interface(metadata_file):
                         st.warning("No image available.")
                     
                     # Display timing information
-                    timing = format_timing(
-                        keyframe.get("start_time"),
-                        keyframe.get("end_time")
-                    )
-                    st.caption(timing)
+                    st.caption(summary_cols["Timing"][index])
                     
                     # Display detected labels
                     if keyframe.get("labels"):
-                        st.caption("Labels: " + ", ".join([l["name"] for l in keyframe["labels"]]))
+                        st.caption("Labels: " + summary_cols["Labels"][index])
                     
                     # Display detected faces
                     if keyframe.get("faces"):
-                        st.caption("Faces: " + ", ".join([f["name"] for f in keyframe["faces"]]))
+                        st.caption("Faces: " + summary_cols["Faces"][index])
                     
                     # Display OCR text
                     if keyframe.get("ocr_text"):
-                        st.caption("OCR: " + " ".join([t["text"] for t in keyframe["ocr_text"]]))
+                        st.caption("OCR: " + summary_cols["OCR Text"][index])
                     
                     # Display shot tags
                     if keyframe.get("shot_tags"):
-                        st.caption("Shot Tags: " + ", ".join(keyframe["shot_tags"]))
+                        st.caption("Shot Tags: " + summary_cols["Shot Tags"][index])
                     
                     # Annotation input
                     current_annotation = keyframe.get("annotation", "")
@@ -546,7 +941,8 @@ def annotation_interface(metadata_file):
                         value=current_annotation,
                         key=key,
                         height=100,
-                        on_change=lambda: st.session_state.__setitem__('has_unsaved_changes', True)
+                        on_change=mark_annotation_dirty,
+                        args=(keyframe["frame_index"],)
                     )
                     
                     # Update keyframe with current annotation from session state
@@ -554,18 +950,21 @@ def annotation_interface(metadata_file):
                         keyframe["annotation"] = st.session_state[key]
                         if st.session_state[key] != current_annotation:
                             st.info(f"Updated annotation for frame {keyframe['frame_index']}: {st.session_state[key]}")
+                    annotation_column.append(keyframe.get("annotation", ""))
 
+    # One table backs both the summary and the CSV export
+    keyframes_df = pd.DataFrame({**summary_cols, "Annotation": annotation_column})
+    
+    if export_requested:
+        try:
+            export_df = keyframes_df[["Frame", "Annotation", "Start Time", "End Time", "Labels", "Faces", "OCR Text"]]
+            export_path = os.path.join("data", "processed", f"{base_name}_annotations.csv")
+            export_df.rename(columns={"Frame": "Frame Index"}).to_csv(export_path, index=False)
+            export_status.success(f"Annotations exported to {export_path}")
+        except Exception as e:
+            export_status.error(f"Failed to export annotations: {e}")
+    
     # Display summary of annotations
     st.header("Annotation Summary")
-    annotations_df = pd.DataFrame([
-        {
-            "Frame": kf.get("frame_index"),
-            "Annotation": kf.get("annotation", ""),
-            "Timing": format_timing(kf.get("start_time"), kf.get("end_time")),
-            "Labels": ", ".join([l["name"] for l in kf.get("labels", [])]),
-            "Faces": ", ".join([f["name"] for f in kf.get("faces", [])]),
-            "OCR Text": " ".join([t["text"] for t in kf.get("ocr_text", [])])
-        }
-        for kf in keyframes
-    ])
+    annotations_df = keyframes_df[["Frame", "Annotation", "Timing", "Labels", "Faces", "OCR Text"]]
     st.dataframe(annotations_df, use_container_width=True)
@@ -1,8 +1,69 @@
 import os
-import json
-import requests
+import asyncio
+import httpx
 from urllib.parse import urljoin
 from dotenv import load_dotenv
+from src.insights_io import load_insights
+
+# Thumbnails fetched at once; HTTP/2 multiplexes them over a shared connection
+MAX_CONCURRENT_DOWNLOADS = 32
+# Bodies are streamed to disk in 64 KiB chunks instead of being buffered whole
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Connection attempts retried by the transport before a thumbnail is reported as failed
+DOWNLOAD_RETRIES = 3
+
+def collect_thumbnail_ids(video_insights):
+    """Get the unique thumbnail IDs of all shot keyframes, in metadata order."""
+    thumbnail_ids = {}
+    for shot in video_insights.get("shots", []):
+        for keyframe in shot.get("keyFrames", []):
+            for instance in keyframe.get("instances", []):
+                thumbnail_id = instance.get("thumbnailId")
+                if thumbnail_id:
+                    thumbnail_ids[thumbnail_id] = None
+    return list(thumbnail_ids)
+
+async def _fetch(client, semaphore, thumbnail_url, thumbnail_path, thumbnail_id):
+    """Download one thumbnail; returns whether it was saved."""
+    async with semaphore:
+        print(f"Trying URL: {thumbnail_url}")
+        # Write to a temporary file so an interrupted download never looks complete
+        tmp_path = f"{thumbnail_path}.part"
+        try:
+            async with client.stream("GET", thumbnail_url) as response:
+                response.raise_for_status()
+                
+                # Save the thumbnail without blocking the other downloads
+                with open(tmp_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+            os.replace(tmp_path, thumbnail_path)
+            
+            print(f"Downloaded thumbnail: {thumbnail_id}")
+            return True
+        
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"Error downloading thumbnail {thumbnail_id}: {e}")
+            return False
+
+async def _download_all(downloads, access_token):
+    """Download (thumbnail_url, thumbnail_path, thumbnail_id) requests concurrently over one client."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=DOWNLOAD_RETRIES,
+        limits=httpx.Limits(max_connections=MAX_CONCURRENT_DOWNLOADS,
+                            max_keepalive_connections=MAX_CONCURRENT_DOWNLOADS),
+    )
+    async with httpx.AsyncClient(
+        transport=transport,
+        headers={"Authorization": f"Bearer {access_token}"},
+    ) as client:
+        results = await asyncio.gather(
+            *[_fetch(client, semaphore, *request) for request in downloads])
+    return [request[2] for request, saved in zip(downloads, results) if saved]
 
 def download_thumbnails(metadata_file, account_id, video_id, access_token):
     """
@@ -19,8 +80,7 @@ def download_thumbnails(metadata_file, account_id, video_id, access_token):
     os.makedirs(thumbnails_dir, exist_ok=True)
     
     # Load metadata
-    with open(metadata_file, "r") as f:
-        metadata = json.load(f)
+    metadata = load_insights(metadata_file)
     
     # Get video insights
     video_insights = metadata.get("videos", [{}])[0].get("insights", {})
@@ -28,41 +88,25 @@ def download_thumbnails(metadata_file, account_id, video_id, access_token):
     # Base URL for Azure Video Indexer API
     base_url = f"https://api.videoindexer.ai"
     
-    # Track downloaded thumbnails to avoid duplicates
-    downloaded_thumbnails = set()
+    # Collect each thumbnail once, then download them all concurrently
+    downloads = []
+    skipped = 0
+    for thumbnail_id in collect_thumbnail_ids(video_insights):
+        # Thumbnails saved by an earlier run don't need to be fetched again
+        thumbnail_path = os.path.join(thumbnails_dir, f"{thumbnail_id}.jpg")
+        if os.path.exists(thumbnail_path) and os.path.getsize(thumbnail_path) > 0:
+            skipped += 1
+            continue
+        
+        # Construct the thumbnail URL
+        thumbnail_url = f"{base_url}/westus2/Accounts/{account_id}/Videos/{video_id}/Thumbnails/{thumbnail_id}"
+        downloads.append((thumbnail_url, thumbnail_path, thumbnail_id))
     
-    # Extract and download thumbnails from shots
-    for shot in video_insights.get("shots", []):
-        for keyframe in shot.get("keyFrames", []):
-            for instance in keyframe.get("instances", []):
-                thumbnail_id = instance.get("thumbnailId")
-                if thumbnail_id and thumbnail_id not in downloaded_thumbnails:
-                    # Construct the thumbnail URL
-                    thumbnail_url = f"{base_url}/westus2/Accounts/{account_id}/Videos/{video_id}/Thumbnails/{thumbnail_id}"
-                    print(f"Trying URL: {thumbnail_url}")
-                    
-                    # Add authorization header
-                    headers = {
-                        "Authorization": f"Bearer {access_token}"
-                    }
-                    
-                    try:
-                        # Download the thumbnail
-                        response = requests.get(thumbnail_url, headers=headers)
-                        response.raise_for_status()
-                        
-                        # Save the thumbnail
-                        thumbnail_path = os.path.join(thumbnails_dir, f"{thumbnail_id}.jpg")
-                        with open(thumbnail_path, "wb") as f:
-                            f.write(response.content)
-                        
-                        downloaded_thumbnails.add(thumbnail_id)
-                        print(f"Downloaded thumbnail: {thumbnail_id}")
-                        
-                    except Exception as e:
-                        print(f"Error downloading thumbnail {thumbnail_id}: {e}")
+    downloaded_thumbnails = asyncio.run(_download_all(downloads, access_token)) if downloads else []
     
     print(f"\nDownloaded {len(downloaded_thumbnails)} thumbnails to {thumbnails_dir}/")
+    if skipped:
+        print(f"Skipped {skipped} thumbnails that were already downloaded")
 
 def main():
     # Load environment variables from .env file
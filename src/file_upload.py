@@ -1,8 +1,12 @@
 import streamlit as st
 import os
+import shutil
 
 RAW_VIDEO_DIR = "data/raw_videos"
 
+# Uploads are copied to disk in 4 MiB chunks rather than in a single write
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+
 
 def upload_video():
     """
@@ -16,8 +20,15 @@ def upload_video():
         if not os.path.exists(RAW_VIDEO_DIR):
             os.makedirs(RAW_VIDEO_DIR)
         file_path = os.path.join(RAW_VIDEO_DIR, uploaded_file.name)
+        uploaded_file.seek(0)
         with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+            shutil.copyfileobj(uploaded_file, f, length=COPY_BUFFER_SIZE)
+            # The video is read back once for indexing, so don't let it crowd the page cache.
+            # DONTNEED skips dirty pages, so they have to be written back first.
+            if hasattr(os, "posix_fadvise"):
+                f.flush()
+                os.fdatasync(f.fileno())
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
         st.success(f"File uploaded successfully: {uploaded_file.name}")
         return file_path
     return None
@@ -0,0 +1,35 @@
+import os
+import msgpack
+import orjson
+
+
+def msgpack_path(json_path):
+    """Get the MessagePack file stored alongside an insights JSON file."""
+    return os.path.splitext(json_path)[0] + ".msgpack"
+
+
+def save_insights(insights, json_path):
+    """
+    Save insights as pretty-printed JSON for people and tools, plus a MessagePack copy
+    alongside it that load_insights reads much faster.
+    """
+    with open(json_path, "wb") as f:
+        f.write(orjson.dumps(insights, option=orjson.OPT_INDENT_2))
+    with open(msgpack_path(json_path), "wb") as f:
+        f.write(msgpack.packb(insights, use_bin_type=True))
+
+
+def load_insights(json_path):
+    """
+    Load insights saved at `json_path`, preferring the MessagePack copy alongside it.
+    Falls back to the JSON file when there is no copy or the JSON was modified after it.
+    """
+    packed_path = msgpack_path(json_path)
+    try:
+        if os.path.getmtime(packed_path) >= os.path.getmtime(json_path):
+            with open(packed_path, "rb") as f:
+                return msgpack.unpackb(f.read(), raw=False)
+    except OSError:
+        pass
+    with open(json_path, "rb") as f:
+        return orjson.loads(f.read())
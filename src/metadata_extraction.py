@@ -1,22 +1,129 @@
 import cv2
 import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 import numpy as np
 import cvlib as cv
 from cvlib.object_detection import draw_bbox
+from cvlib.utils import download_file
 import progressbar
 
-progressbar.ProgressBar.update = lambda self, value, **kwargs: None
+# onnxruntime is only needed for the optional INT8 YOLO model (see quantize_yolo.py)
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
 
 PROCESSED_DIR = "data/processed"
 
+# Scene changes show up at a quarter of the resolution; keyframes are still written full size
+DIFF_DOWNSCALE = 4
 
-def extract_keyframes(video_path, threshold=40):
+# cvlib downloads YOLOv3-tiny here on first use; batched inference loads the same files
+YOLO_DIR = os.path.join(os.path.expanduser("~"), ".cvlib",
+                        "object_detection", "yolo", "yolov3")
+YOLO_FILES = {
+    "yolov3-tiny.cfg": "https://github.com/pjreddie/darknet/raw/master/cfg/yolov3-tiny.cfg",
+    "yolov3-tiny.weights": "https://pjreddie.com/media/files/yolov3-tiny.weights",
+    "yolov3_classes.txt": "https://github.com/arunponnusamy/object-detection-opencv/raw/master/yolov3.txt",
+}
+FACE_MODEL_DIR = os.path.join(os.path.dirname(cv.__file__), "data")
+
+# YOLO_ONNX_MODEL may point at a YOLOv3-tiny ONNX model (typically INT8 from quantize_yolo.py)
+# to run with onnxruntime instead of the Darknet weights; it must keep the Darknet output layout
+ONNX_PROVIDERS = ["OpenVINOExecutionProvider",
+                  "CUDAExecutionProvider", "CPUExecutionProvider"]
+
+# Keyframes per forward pass; the thresholds are cvlib's defaults
+DETECTION_BATCH_SIZE = 32
+OBJECT_CONFIDENCE = 0.5
+OBJECT_NMS_THRESHOLD = 0.3
+FACE_CONFIDENCE = 0.5
+
+# metadata=print logs each selected frame as "frame:N pts:P pts_time:T" followed by its scene score
+_FFMPEG_FRAME_PATTERN = re.compile(r"pts_time:(\S+)")
+_FFMPEG_SCORE_PATTERN = re.compile(r"lavfi\.scene_score=(\S+)")
+
+# Frames decoded per differencing batch; each one is held in BGR until its diff is known
+DIFF_BATCH_SIZE = 32
+
+# Selected keyframes waiting for the background JPEG writer; decoding blocks when it is full
+WRITE_QUEUE_SIZE = 16
+
+
+def _write_keyframes(write_queue, errors):
+    """
+    Write (path, frame) items from the queue until the None sentinel arrives.
+    Errors are recorded and the queue keeps draining, so the decode loop never blocks on a dead writer.
+    """
+    while (item := write_queue.get()) is not None:
+        try:
+            cv2.imwrite(*item)
+        except Exception as e:
+            errors.append(e)
+
+
+def extract_keyframes_ffmpeg(video_path, threshold=40):
+    """
+    Extract keyframes with FFmpeg's scene-change filter, which decodes, scores and
+    writes the selected frames without passing any frame through Python.
+
+    `threshold` is on the same 0-255 scale as extract_keyframes; FFmpeg's scene
+    score is normalised to 0-1, so diff_mean is reported as score * 255.
+    """
+
+    if not os.path.exists(PROCESSED_DIR):
+        os.makedirs(PROCESSED_DIR)
+
+    # FFmpeg only reports timestamps, so map them back to frame indices with the stream rate
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    cap.release()
+
+    with tempfile.TemporaryDirectory(dir=PROCESSED_DIR) as output_dir:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-nostdin", "-i", video_path,
+             "-vf", f"select='gt(scene,{threshold / 255})',metadata=print",
+             "-vsync", "vfr", "-q:v", "2",
+             os.path.join(output_dir, "keyframe_%d.jpg")],
+            capture_output=True, text=True, check=True)
+
+        pts_times = [float(t) for t in _FFMPEG_FRAME_PATTERN.findall(result.stderr)]
+        scores = [float(s) for s in _FFMPEG_SCORE_PATTERN.findall(result.stderr)]
+
+        keyframes = []
+
+        # Output images are numbered from 1 in selection order; rename them to the
+        # frame_index naming extract_keyframes uses
+        for number, (pts_time, score) in enumerate(zip(pts_times, scores), start=1):
+            frame_idx = round(pts_time * fps)
+            keyframe_path = os.path.join(
+                PROCESSED_DIR, f"keyframe_{frame_idx}.jpg")
+            shutil.move(os.path.join(output_dir, f"keyframe_{number}.jpg"),
+                        keyframe_path)
+            keyframes.append({
+                "frame_index": frame_idx,
+                "keyframe_path": keyframe_path,
+                "diff_mean": score * 255
+            })
+
+    return keyframes
+
+
+def extract_keyframes(video_path, threshold=40, use_ffmpeg=False):
     """
     Extract keyframes from the given video using frame differencing.
 
     Parameters:
         video_path (str): Path to the video file.
         threshold (float): The difference threshold to detect scene changes.
+        use_ffmpeg (bool): Use extract_keyframes_ffmpeg instead of decoding in Python.
 
     Returns:
         list: A list of dictionaries containing keyframe info:
@@ -27,6 +134,9 @@ def extract_keyframes(video_path, threshold=40):
               }
     """
 
+    if use_ffmpeg:
+        return extract_keyframes_ffmpeg(video_path, threshold)
+
     if not os.path.exists(PROCESSED_DIR):
         os.makedirs(PROCESSED_DIR)
 
@@ -34,43 +144,87 @@ def extract_keyframes(video_path, threshold=40):
 
     keyframes = []
 
-    prev_frame = None
+    # Downscaled grayscale frames of the current batch; slot 0 carries the last frame of the
+    # previous batch so the first diff of each batch compares against it
+    gray_batch = None
+    frames = []
+    has_prev = False
 
-    frame_idx = 0
+    batch_start = 0
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # JPEG encoding releases the GIL, so writing keyframes on a background thread
+    # overlaps it with decoding; cap.read returns a fresh array per frame, so no copy is needed
+    write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    write_errors = []
+    writer = threading.Thread(
+        target=_write_keyframes, args=(write_queue, write_errors), daemon=True)
+    writer.start()
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if ret:
+                if gray_batch is None:
+                    # Size every buffer from the first frame so the loop itself never allocates
+                    small_size = (max(1, frame.shape[1] // DIFF_DOWNSCALE),
+                                  max(1, frame.shape[0] // DIFF_DOWNSCALE))
+                    gray = np.empty(frame.shape[:2], np.uint8)
+                    gray_batch = np.empty(
+                        (DIFF_BATCH_SIZE + 1, small_size[1], small_size[0]), np.uint8)
+                    diff_batch = np.empty(
+                        (DIFF_BATCH_SIZE, small_size[1], small_size[0]), np.uint8)
+                    inv_pixels = 1.0 / (small_size[0] * small_size[1])
+                cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray)
+                cv2.resize(gray, small_size, dst=gray_batch[len(frames) + 1],
+                           interpolation=cv2.INTER_AREA)
+                frames.append(frame)
 
-        if prev_frame is not None:
-            diff = cv2.absdiff(gray, prev_frame)
+            if frames and (not ret or len(frames) == DIFF_BATCH_SIZE):
+                # Diff every frame in the batch against its predecessor in one pass,
+                # summing in integers instead of a float64 mean over every pixel
+                count = len(frames)
+                first = 0 if has_prev else 1
+                # A lone first frame has no predecessor to diff against
+                if count > first:
+                    diffs = cv2.absdiff(
+                        gray_batch[first + 1:count + 1], gray_batch[first:count],
+                        dst=diff_batch[:count - first])
+                    diff_means = diffs.reshape(count - first, -1).sum(
+                        axis=1, dtype=np.uint64) * inv_pixels
 
-            diff_mean = np.mean(diff)
+                    for offset in np.flatnonzero(diff_means > threshold):
+                        pos = first + offset
+                        frame_idx = batch_start + pos
+                        keyframe_path = os.path.join(
+                            PROCESSED_DIR, f"keyframe_{frame_idx}.jpg")
+                        write_queue.put((keyframe_path, frames[pos]))
+                        keyframes.append({
+                            "frame_index": int(frame_idx),
+                            "keyframe_path": keyframe_path,
+                            "diff_mean": float(diff_means[offset])
+                        })
 
-            if diff_mean > threshold:
-                keyframe_path = os.path.join(
-                    PROCESSED_DIR, f"keyframe_{frame_idx}.jpg")
-                cv2.imwrite(keyframe_path, frame)
-                keyframes.append({
-                    "frame_index": frame_idx,
-                    "keyframe_path": keyframe_path,
-                    "diff_mean": diff_mean
-                })
+                gray_batch[0] = gray_batch[count]
+                has_prev = True
+                batch_start += count
+                frames.clear()
 
-        prev_frame = gray
-        frame_idx += 1
+            if not ret:
+                break
+    finally:
+        write_queue.put(None)
+        writer.join()
+        cap.release()
 
-    cap.release()
+    if write_errors:
+        raise write_errors[0]
     return keyframes
 
 
 def enhance_keyframe(keyframe):
     """
     Enhance a keyframe dictionary with object and face detection data.
-    Uses cvlib for object detection (using yolov3-tiny) and face detection.
+    Uses cvlib's YOLOv3-tiny and res10 SSD models, loaded once per process.
     Returns the updated keyframe dictionary.
     """
     image = cv2.imread(keyframe["keyframe_path"])
@@ -78,36 +232,256 @@ def enhance_keyframe(keyframe):
         return keyframe
 
     # --- Object Detection ---
-    # Detect common objects using cvlib with the YOLOv3-tiny model
-    bbox, labels, confidences = cv.detect_common_objects(
-        image, model='yolov3-tiny')
-    objects = []
-    for box, label, conf in zip(bbox, labels, confidences):
-        objects.append({
-            "label": label,
-            "confidence": conf,
-            "bounding_box": box
-        })
+    # Detect common objects with the cached YOLOv3-tiny model
+    objects = detect_objects_batch(
+        _get_yolo_model(), _get_yolo_classes(), [image])[0]
 
     # --- Face Detection ---
-    faces, face_confidences = cv.detect_face(image)
-    detected_faces = []
-    for face_box, face_conf in zip(faces, face_confidences):
-        detected_faces.append({
-            "bounding_box": face_box,
-            "confidence": face_conf
-        })
+    detected_faces = detect_faces_batch(_get_face_net(), [image])[0]
 
     keyframe["objects"] = objects
     keyframe["faces"] = detected_faces
     return keyframe
 
 
-def process_video_metadata(video_path, threshold=40):
+def _has_cuda():
+    """Check whether this OpenCV build can run DNN networks on a CUDA device."""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
+
+
+def _configure_backend(net):
+    """
+    Run the network on CUDA when this OpenCV build has a usable device, otherwise
+    on the CPU at FP16 (OpenCV falls back to FP32 on CPUs without FP16 kernels).
+    """
+    if _has_cuda():
+        net.setPreferableBackend(cv2.dnn.DNN_BACKEND_CUDA)
+        net.setPreferableTarget(cv2.dnn.DNN_TARGET_CUDA)
+    elif hasattr(cv2.dnn, "DNN_TARGET_CPU_FP16"):
+        net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU_FP16)
+    return net
+
+
+_progressbar_silenced = False
+
+
+def _silence_cvlib_progressbar():
+    """
+    Disable progressbar updates before cvlib downloads a model. cvlib sizes the bar from
+    Content-Length but updates it once per received chunk, which can run past maxval and raise.
+    """
+    global _progressbar_silenced
+    if not _progressbar_silenced:
+        progressbar.ProgressBar.update = lambda self, value=None, **kwargs: None
+        _progressbar_silenced = True
+
+
+def _download_yolo_files():
+    """Fetch the YOLOv3-tiny files into cvlib's cache directory if they are missing."""
+    for file_name, url in YOLO_FILES.items():
+        if not os.path.exists(os.path.join(YOLO_DIR, file_name)):
+            _silence_cvlib_progressbar()
+            download_file(url=url, file_name=file_name, dest_dir=YOLO_DIR)
+
+
+@lru_cache(maxsize=1)
+def _get_yolo_net():
+    """Load the YOLOv3-tiny network once per process."""
+    _download_yolo_files()
+    return _configure_backend(cv2.dnn.readNet(
+        os.path.join(YOLO_DIR, "yolov3-tiny.weights"),
+        os.path.join(YOLO_DIR, "yolov3-tiny.cfg")))
+
+
+@lru_cache(maxsize=1)
+def _get_yolo_session():
+    """
+    Open the YOLO_ONNX_MODEL model once per process with the preferred available execution
+    providers, or return None when it isn't configured or onnxruntime is missing.
+    """
+    model_path = os.environ.get("YOLO_ONNX_MODEL")
+    if ort is None or not model_path or not os.path.exists(model_path):
+        return None
+    available = ort.get_available_providers()
+    return ort.InferenceSession(
+        model_path,
+        providers=[p for p in ONNX_PROVIDERS if p in available])
+
+
+def _get_yolo_model():
+    """Get the ONNX Runtime session when one is configured, otherwise the cv2.dnn network."""
+    session = _get_yolo_session()
+    return session if session is not None else _get_yolo_net()
+
+
+@lru_cache(maxsize=1)
+def _get_yolo_classes():
+    """Load the YOLOv3-tiny class names once per process."""
+    _download_yolo_files()
+    with open(os.path.join(YOLO_DIR, "yolov3_classes.txt")) as f:
+        return [line.strip() for line in f]
+
+
+@lru_cache(maxsize=1)
+def _get_face_net():
+    """Load cvlib's res10 SSD face detector once per process."""
+    return _configure_backend(cv2.dnn.readNetFromCaffe(
+        os.path.join(FACE_MODEL_DIR, "deploy.prototxt"),
+        os.path.join(FACE_MODEL_DIR, "res10_300x300_ssd_iter_140000.caffemodel")))
+
+
+def load_detection_models():
+    """
+    Get the YOLOv3-tiny object detector and cvlib's res10 SSD face detector for
+    batched inference. Returns (yolo_net, classes, face_net).
+    """
+    return _get_yolo_model(), _get_yolo_classes(), _get_face_net()
+
+
+def yolo_blob(images):
+    """Build the NCHW YOLOv3-tiny input blob for a list of BGR images, as cvlib does."""
+    return cv2.dnn.blobFromImages(
+        images, 0.00392, (416, 416), (0, 0, 0), True, crop=False)
+
+
+def detect_objects_batch(model, classes, images):
+    """
+    Run YOLOv3-tiny over a list of images in one forward pass.
+    `model` is a cv2.dnn network or an onnxruntime session with the same outputs.
+    Returns one list of {"label", "confidence", "bounding_box"} dicts per image,
+    decoded the same way as cv.detect_common_objects.
+    """
+    blob = yolo_blob(images)
+    if ort is not None and isinstance(model, ort.InferenceSession):
+        outputs = model.run(None, {model.get_inputs()[0].name: blob})
+    else:
+        model.setInput(blob)
+        outputs = model.forward(model.getUnconnectedOutLayersNames())
+
+    # Each YOLO output layer is (N, rows, 85) for a batch and (rows, 85) for one image
+    outs = [out.reshape(len(images), -1, out.shape[-1]) for out in outputs]
+
+    results = []
+    for i, image in enumerate(images):
+        height, width = image.shape[:2]
+
+        detections = np.concatenate([out[i] for out in outs])
+        scores = detections[:, 5:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        keep = confidences > OBJECT_CONFIDENCE
+        detections = detections[keep]
+        class_ids = class_ids[keep]
+        confidences = confidences[keep].tolist()
+
+        # Centres and sizes are truncated to pixels before converting to corners, as cvlib does
+        w = (detections[:, 2] * width).astype(int)
+        h = (detections[:, 3] * height).astype(int)
+        x = (detections[:, 0] * width).astype(int) - w / 2
+        y = (detections[:, 1] * height).astype(int) - h / 2
+        boxes = np.stack([x, y, w, h], axis=1).tolist()
+
+        objects = []
+        indices = cv2.dnn.NMSBoxes(
+            boxes, confidences, OBJECT_CONFIDENCE, OBJECT_NMS_THRESHOLD)
+        for j in np.asarray(indices, dtype=int).reshape(-1):
+            box_x, box_y, box_w, box_h = boxes[j]
+            objects.append({
+                "label": classes[class_ids[j]],
+                "confidence": confidences[j],
+                "bounding_box": [int(box_x), int(box_y),
+                                 int(box_x + box_w), int(box_y + box_h)]
+            })
+        results.append(objects)
+
+    return results
+
+
+def detect_faces_batch(net, images):
+    """
+    Run the res10 SSD face detector over a list of images in one forward pass.
+    Returns one list of {"bounding_box", "confidence"} dicts per image.
+    """
+    blob = cv2.dnn.blobFromImages(images, 1.0, (300, 300), (104.0, 177.0, 123.0))
+    net.setInput(blob)
+
+    # Detections from every image share one (rows, 7) table tagged with the image id
+    detections = net.forward()[0, 0]
+    detections = detections[(detections[:, 0] >= 0)
+                            & (detections[:, 2] >= FACE_CONFIDENCE)]
+
+    results = [[] for _ in images]
+    for image_id, _, conf, *box in detections:
+        height, width = images[int(image_id)].shape[:2]
+        start_x, start_y, end_x, end_y = (
+            np.array(box) * [width, height, width, height]).astype(int)
+        results[int(image_id)].append({
+            "bounding_box": [int(start_x), int(start_y), int(end_x), int(end_y)],
+            "confidence": float(conf)
+        })
+
+    return results
+
+
+def enhance_keyframes(keyframes, models=None):
+    """
+    Enhance keyframe dictionaries with object and face detection data, running
+    both detectors on batches of DETECTION_BATCH_SIZE keyframes.
+    Keyframes whose image can't be read are returned unchanged.
+    """
+    yolo_net, classes, face_net = models or load_detection_models()
+
+    with ThreadPoolExecutor() as executor:
+        for start in range(0, len(keyframes), DETECTION_BATCH_SIZE):
+            batch = keyframes[start:start + DETECTION_BATCH_SIZE]
+            images = executor.map(
+                cv2.imread, [kf["keyframe_path"] for kf in batch])
+            readable = [(kf, image) for kf, image in zip(batch, images)
+                        if image is not None]
+            if not readable:
+                continue
+
+            batch_images = [image for _, image in readable]
+            objects = detect_objects_batch(yolo_net, classes, batch_images)
+            faces = detect_faces_batch(face_net, batch_images)
+            for (keyframe, _), keyframe_objects, keyframe_faces in zip(readable, objects, faces):
+                keyframe["objects"] = keyframe_objects
+                keyframe["faces"] = keyframe_faces
+
+    return keyframes
+
+
+def _init_detection_worker():
+    # Each worker runs its own inference, so keep OpenCV from spawning a thread pool per process
+    cv2.setNumThreads(1)
+
+
+def process_video_metadata(video_path, threshold=40, use_ffmpeg=False):
     """
     Extract keyframes from a video and enhance each keyframe with object and face detection data.
+    On a GPU all keyframes go through one batched pipeline; on the CPU chunks of keyframes are
+    spread over a process pool, each worker loading the models once.
     Returns a list of enhanced keyframe dictionaries.
     """
-    keyframes = extract_keyframes(video_path, threshold)
-    enhanced_keyframes = [enhance_keyframe(kf) for kf in keyframes]
+    keyframes = extract_keyframes(video_path, threshold, use_ffmpeg)
+
+    workers = os.cpu_count() or 1
+    if _has_cuda() or workers == 1 or len(keyframes) <= DETECTION_BATCH_SIZE:
+        return enhance_keyframes(keyframes)
+
+    # Download the model files once here rather than racing to do it in every worker
+    _get_yolo_classes()
+
+    chunk_size = min(DETECTION_BATCH_SIZE, -(-len(keyframes) // workers))
+    chunks = [keyframes[i:i + chunk_size]
+              for i in range(0, len(keyframes), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_detection_worker) as executor:
+        enhanced_keyframes = [keyframe
+                              for chunk in executor.map(enhance_keyframes, chunks)
+                              for keyframe in chunk]
     return enhanced_keyframes
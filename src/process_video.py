@@ -2,6 +2,7 @@ import os
 from dotenv import load_dotenv
 from VideoIndexerClient.Consts import Consts
 from VideoIndexerClient.VideoIndexerClient import VideoIndexerClient
+from src.insights_io import save_insights
 from pprint import pprint
 
 def process_video(video_path):
@@ -54,9 +55,7 @@ def process_video(video_path):
     os.makedirs(output_dir, exist_ok=True)
     output_file = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(video_path))[0]}_cloud.json")
     
-    with open(output_file, 'w') as f:
-        import json
-        json.dump(insights, f, indent=2)
+    save_insights(insights, output_file)
     
     print(f"Insights saved to: {output_file}")
     return insights
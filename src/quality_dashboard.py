@@ -1,20 +1,107 @@
 import streamlit as st
-import json
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import os
+from collections import defaultdict
 from datetime import datetime
+from src.insights_io import load_insights
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_metadata_cached(metadata_file, mtime):
+    """Parse the metadata file once per version; `mtime` only keys the cache."""
+    return load_insights(metadata_file)
+
+def load_metadata(metadata_file):
+    """Load the metadata file, reusing the parsed copy until the file changes."""
+    return _load_metadata_cached(metadata_file, os.path.getmtime(metadata_file))
+
+def get_annotations_file(base_name):
+    """Get the path of the separate annotations file for a video."""
+    return os.path.join("data", "processed", f"{base_name}_annotations.json")
+
+def get_annotations_mtime(base_name):
+    """Get the annotations file's mtime, or None when there is no annotations file yet."""
+    annotations_file = get_annotations_file(base_name)
+    return os.path.getmtime(annotations_file) if os.path.exists(annotations_file) else None
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_annotations_cached(annotations_file, mtime):
+    """Parse the annotations file once per version; `mtime` only keys the cache."""
+    with open(annotations_file, "rb") as f:
+        return orjson.loads(f.read())
 
 def load_annotations(base_name):
     """Load annotations from the separate annotations file."""
-    annotations_file = os.path.join("data", "processed", f"{base_name}_annotations.json")
+    annotations_file = get_annotations_file(base_name)
     if os.path.exists(annotations_file):
         try:
-            with open(annotations_file, "r") as f:
-                return json.load(f)
+            return _load_annotations_cached(annotations_file, os.path.getmtime(annotations_file))
         except:
             return {}
     return {}
 
+@st.cache_data(show_spinner=False, max_entries=8)
+def _quality_metrics_tables(metadata_file, base_name, metadata_mtime, annotations_mtime):
+    """
+    Compute the dashboard metrics and tables for one version of the metadata and annotations
+    files; the mtimes only key the cache. Tables are None when there is nothing to show.
+    Returns (metrics, labels_df, ocr_df, annotations_df, annotations_csv).
+    """
+    metadata = load_metadata(metadata_file)
+    annotations = load_annotations(base_name)
+    
+    # Get video insights
+    video_insights = metadata.get("videos", [{}])[0].get("insights", {})
+    
+    # Calculate basic metrics
+    total_keyframes = len([shot for shot in video_insights.get("shots", [])])
+    annotated_frames = len(annotations)
+    metrics = {
+        "total_keyframes": total_keyframes,
+        "annotated_frames": annotated_frames,
+        "completeness": (annotated_frames / total_keyframes * 100) if total_keyframes > 0 else 0,
+        # Azure insights metrics
+        "total_labels": len(video_insights.get("labels", [])),
+        "total_ocr": len(video_insights.get("ocr", []))
+    }
+    
+    # Labels breakdown
+    labels_df = None
+    if video_insights.get("labels"):
+        labels_df = pd.DataFrame([
+            {
+                "Label": label.get("name"),
+                "Instances": len(label.get("instances", []))
+            }
+            for label in video_insights.get("labels", [])
+        ]).sort_values("Instances", ascending=False).head(10)
+    
+    # OCR text
+    ocr_df = None
+    if video_insights.get("ocr"):
+        ocr_df = pd.DataFrame([
+            {
+                "Text": ocr.get("text"),
+                "Instances": len(ocr.get("instances", []))
+            }
+            for ocr in video_insights.get("ocr", [])
+        ])
+    
+    # Annotation summary and its CSV export
+    annotations_df = None
+    annotations_csv = None
+    if annotations:
+        annotation_columns = {
+            "Frame ID": list(annotations.keys()),
+            "Annotation": list(annotations.values())
+        }
+        annotations_df = pd.DataFrame(annotation_columns, columns=["Frame ID", "Annotation"])
+        annotations_csv = to_csv_bytes(annotation_columns)
+    
+    return metrics, labels_df, ocr_df, annotations_df, annotations_csv
+
 def display_quality_metrics(metadata_file):
     """
     Load metadata and annotations from their respective files and display key quality metrics.
@@ -22,27 +109,15 @@ def display_quality_metrics(metadata_file):
     and insights from Azure Video Indexer.
     """
     try:
-        with open(metadata_file, "r") as f:
-            metadata = json.load(f)
+        metadata = load_metadata(metadata_file)
             
         # Get base video name
         video_name = metadata.get("name", "")
         base_name = video_name.split('_')[0]
         
-        # Load annotations
-        annotations = load_annotations(base_name)
-        
-        # Get video insights
-        video_insights = metadata.get("videos", [{}])[0].get("insights", {})
-        
-        # Calculate basic metrics
-        total_keyframes = len([shot for shot in video_insights.get("shots", [])])
-        annotated_frames = len(annotations)
-        completeness = (annotated_frames / total_keyframes * 100) if total_keyframes > 0 else 0
-        
-        # Calculate Azure insights metrics
-        total_labels = len(video_insights.get("labels", []))
-        total_ocr = len(video_insights.get("ocr", []))
+        # Metrics and tables only need recomputing when the metadata or annotations change
+        metrics, labels_df, ocr_df, annotations_df, annotations_csv = _quality_metrics_tables(
+            metadata_file, base_name, os.path.getmtime(metadata_file), get_annotations_mtime(base_name))
         
         # Display metrics
         st.subheader("Quality Metrics")
@@ -50,55 +125,36 @@ def display_quality_metrics(metadata_file):
         # Basic metrics
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("Total Keyframes", total_keyframes)
-            st.metric("Annotated Frames", annotated_frames)
-            st.metric("Annotation Completeness", f"{completeness:.1f}%")
+            st.metric("Total Keyframes", metrics["total_keyframes"])
+            st.metric("Annotated Frames", metrics["annotated_frames"])
+            st.metric("Annotation Completeness", f"{metrics['completeness']:.1f}%")
         
         with col2:
-            st.metric("Detected Labels", total_labels)
-            st.metric("OCR Text Segments", total_ocr)
+            st.metric("Detected Labels", metrics["total_labels"])
+            st.metric("OCR Text Segments", metrics["total_ocr"])
         
         # Detailed insights
         st.subheader("Detailed Insights")
         
         # Labels breakdown
-        if video_insights.get("labels"):
+        if labels_df is not None:
             st.write("**Top Labels:**")
-            labels_df = pd.DataFrame([
-                {
-                    "Label": label.get("name"),
-                    "Instances": len(label.get("instances", []))
-                }
-                for label in video_insights.get("labels", [])
-            ]).sort_values("Instances", ascending=False).head(10)
             st.dataframe(labels_df, use_container_width=True)
         
         # OCR text
-        if video_insights.get("ocr"):
+        if ocr_df is not None:
             st.write("**Detected Text:**")
-            ocr_df = pd.DataFrame([
-                {
-                    "Text": ocr.get("text"),
-                    "Instances": len(ocr.get("instances", []))
-                }
-                for ocr in video_insights.get("ocr", [])
-            ])
             st.dataframe(ocr_df, use_container_width=True)
 
         # Add export annotations button
-        if annotations:
+        if annotations_df is not None:
             st.subheader("Annotation Summary")
-            annotations_df = pd.DataFrame([
-                {"Frame ID": frame_id, "Annotation": annotation}
-                for frame_id, annotation in annotations.items()
-            ])
             st.dataframe(annotations_df, use_container_width=True)
             
             # Create a download button for annotations
-            csv = annotations_df.to_csv(index=False)
             st.download_button(
                 label="Export Annotations",
-                data=csv,
+                data=annotations_csv,
                 file_name=f"{base_name}_annotations.csv",
                 mime="text/csv"
             )
@@ -109,56 +165,83 @@ def display_quality_metrics(metadata_file):
         st.error(f"Traceback: {traceback.format_exc()}")
         return
 
+def _csv_column(values):
+    """
+    Build an Arrow array for a CSV column. Columns Arrow can't type as a single
+    scalar type (mixed ints and strings, nested values) are written as their str().
+    """
+    try:
+        array = pa.array(values)
+        if not pa.types.is_nested(array.type):
+            return array
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+def to_csv_bytes(columns):
+    """Encode a dict of equal-length column lists as CSV with Arrow's native writer."""
+    sink = pa.BufferOutputStream()
+    table = pa.table({name: _csv_column(values) for name, values in columns.items()})
+    pa_csv.write_csv(table, sink, write_options=pa_csv.WriteOptions(quoting_style="needed"))
+    return sink.getvalue().to_pybytes()
+
+def _index_by_keyframe(items, field):
+    """Map each keyframe ID to the `field` of every item with an instance in that keyframe."""
+    index = defaultdict(list)
+    for item in items:
+        for instance in item.get("instances", []):
+            for frame_id in dict.fromkeys(kf.get("id") for kf in instance.get("keyFrames", [])):
+                index[frame_id].append(item.get(field))
+    return index
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _quality_metrics_csv(metadata_file, base_name, metadata_mtime, annotations_mtime):
+    """
+    Build the quality metrics CSV for one version of the metadata and annotations files;
+    the mtimes only key the cache.
+    """
+    metadata = load_metadata(metadata_file)
+    annotations = load_annotations(base_name)
+    
+    # Get video insights
+    video_insights = metadata.get("videos", [{}])[0].get("insights", {})
+    
+    # Index label names and OCR text by keyframe ID once, instead of rescanning every
+    # instance for each keyframe
+    frame_to_labels = _index_by_keyframe(video_insights.get("labels", []), "name")
+    frame_to_ocr = _index_by_keyframe(video_insights.get("ocr", []), "text")
+    
+    # Prepare data for export
+    columns = {"Frame ID": [], "Annotation": [], "Shot Tags": [], "Labels": [], "OCR Text": []}
+    for shot in video_insights.get("shots", []):
+        shot_tags = ", ".join(shot.get("tags", []))
+        for keyframe in shot.get("keyFrames", []):
+            frame_id = keyframe.get("id")
+            columns["Frame ID"].append(frame_id)
+            columns["Annotation"].append(annotations.get(str(frame_id), ""))
+            columns["Shot Tags"].append(shot_tags)
+            columns["Labels"].append(", ".join(frame_to_labels.get(frame_id, [])))
+            columns["OCR Text"].append(", ".join(frame_to_ocr.get(frame_id, [])))
+    
+    return to_csv_bytes(columns)
+
 def export_metrics(metadata_file):
     """
-    Create a comprehensive DataFrame of the keyframes and annotations,
+    Create a comprehensive table of the keyframes and annotations,
     and provide a download button for users to export the metrics.
     """
     try:
-        with open(metadata_file, "r") as f:
-            metadata = json.load(f)
+        metadata = load_metadata(metadata_file)
         
         # Get base video name
         video_name = metadata.get("name", "")
         base_name = video_name.split('_')[0]
         
-        # Load annotations
-        annotations = load_annotations(base_name)
-        
-        # Get video insights
-        video_insights = metadata.get("videos", [{}])[0].get("insights", {})
-        
-        # Prepare data for export
-        data = []
-        for shot in video_insights.get("shots", []):
-            for keyframe in shot.get("keyFrames", []):
-                frame_id = keyframe.get("id")
-                
-                # Get all labels that appear in this keyframe
-                frame_labels = []
-                for label in video_insights.get("labels", []):
-                    for instance in label.get("instances", []):
-                        if any(kf.get("id") == frame_id for kf in instance.get("keyFrames", [])):
-                            frame_labels.append(label.get('name'))
-                
-                # Get OCR text that appears in this keyframe
-                frame_ocr = []
-                for ocr in video_insights.get("ocr", []):
-                    for instance in ocr.get("instances", []):
-                        if any(kf.get("id") == frame_id for kf in instance.get("keyFrames", [])):
-                            frame_ocr.append(ocr.get('text'))
-                
-                data.append({
-                    "Frame ID": frame_id,
-                    "Annotation": annotations.get(str(frame_id), ""),
-                    "Shot Tags": ", ".join(shot.get("tags", [])),
-                    "Labels": ", ".join(frame_labels),
-                    "OCR Text": ", ".join(frame_ocr)
-                })
+        # The CSV only needs rebuilding when the metadata or annotations change
+        csv = _quality_metrics_csv(
+            metadata_file, base_name, os.path.getmtime(metadata_file), get_annotations_mtime(base_name))
         
-        # Create DataFrame and export button
-        df = pd.DataFrame(data)
-        csv = df.to_csv(index=False)
+        # Create export button
         st.download_button(
             label="Export Quality Metrics",
             data=csv,
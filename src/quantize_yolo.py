@@ -0,0 +1,69 @@
+import os
+import glob
+import cv2
+import onnxruntime as ort
+from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+from src.metadata_extraction import PROCESSED_DIR, yolo_blob
+
+# Representative keyframes used to calibrate the INT8 activation ranges
+CALIBRATION_IMAGES = 100
+CALIBRATION_BATCH_SIZE = 8
+
+
+class KeyframeCalibrationReader(CalibrationDataReader):
+    """Feeds batches of keyframes, preprocessed exactly like detect_objects_batch, to the quantizer."""
+
+    def __init__(self, model_path, image_paths, batch_size=CALIBRATION_BATCH_SIZE):
+        session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self.input_name = session.get_inputs()[0].name
+        self.batches = iter([image_paths[i:i + batch_size]
+                             for i in range(0, len(image_paths), batch_size)])
+
+    def get_next(self):
+        for paths in self.batches:
+            images = [image for image in map(cv2.imread, paths) if image is not None]
+            if images:
+                return {self.input_name: yolo_blob(images)}
+        return None
+
+
+def quantize_yolo(fp32_model, int8_model, image_paths):
+    """
+    Statically quantize an FP32 YOLOv3-tiny ONNX export to INT8 (QDQ, per-channel weights),
+    which ONNX Runtime and OpenVINO run with VNNI/AMX integer kernels where available.
+
+    The export must take the (N, 3, 416, 416) blob from yolo_blob with a dynamic batch axis
+    and output the Darknet YOLO layers, so metadata_extraction can decode it unchanged.
+    """
+    reader = KeyframeCalibrationReader(fp32_model, image_paths)
+    quantize_static(
+        fp32_model,
+        int8_model,
+        reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True
+    )
+    print(f"INT8 model saved to: {int8_model}")
+
+
+def main():
+    fp32_model = os.environ.get("YOLO_ONNX_FP32_MODEL", "models/yolov3-tiny.onnx")
+    int8_model = os.environ.get("YOLO_ONNX_MODEL", "models/yolov3-tiny-int8.onnx")
+    if not os.path.exists(fp32_model):
+        print(f"Error: FP32 ONNX model not found at {fp32_model}")
+        return
+
+    image_paths = sorted(glob.glob(os.path.join(PROCESSED_DIR, "keyframe_*.jpg")))[:CALIBRATION_IMAGES]
+    if not image_paths:
+        print(f"Error: No keyframes found in {PROCESSED_DIR} for calibration")
+        return
+
+    os.makedirs(os.path.dirname(int8_model) or ".", exist_ok=True)
+    quantize_yolo(fp32_model, int8_model, image_paths)
+    print(f"Set YOLO_ONNX_MODEL={int8_model} to use it for object detection")
+
+
+if __name__ == "__main__":
+    main()
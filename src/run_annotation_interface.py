@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 from annotation_interface import annotation_interface
+from insights_io import load_insights
 
 # Set page config must be the first Streamlit command
 st.set_page_config(
@@ -9,6 +10,11 @@ st.set_page_config(
     page_icon="🎬"
 )
 
+@st.cache_data(show_spinner=False)
+def load_metadata(metadata_file, mtime):
+    """Parse the metadata file once per version; `mtime` only keys the cache."""
+    return load_insights(metadata_file)
+
 def main():
     # Path to the metadata file and video file
     metadata_file = "data/processed/LeNeil_20250331214136_cloud.json"
@@ -27,9 +33,7 @@ def main():
         return
     
     # Load metadata and add video path
-    import json
-    with open(metadata_file, 'r') as f:
-        metadata = json.load(f)
+    metadata = load_metadata(metadata_file, os.path.getmtime(metadata_file))
     metadata['video_path'] = video_file
     
     # Run the annotation interface
@@ -1,6 +1,24 @@
 import streamlit as st
 
 
+@st.fragment
+def _login_widget():
+    # Typing only reruns this fragment; a successful login reruns the whole app
+    username_input = st.text_input(
+        "Enter your username", key="login_username")
+    if st.button("Login"):
+        st.session_state.username = username_input
+        st.rerun()
+
+
+@st.fragment
+def _logout_widget():
+    if st.button("Logout"):
+        st.session_state.username = None
+        st.session_state.logged_out = True
+        st.rerun()
+
+
 def login():
     """
     Simulate a user login by storing the username in Streamlit's session state.
@@ -11,16 +29,13 @@ def login():
         st.session_state.username = None
 
     if st.session_state.username is None:
-        username_input = st.text_input(
-            "Enter your username", key="login_username")
-        if st.button("Login"):
-            st.session_state.username = username_input
-            st.success(f"Welcome, {username_input}")
+        if st.session_state.pop("logged_out", False):
+            st.success("You have been logged out")
+        _login_widget()
 
     return st.session_state.username
 
 
 def logout():
-    if st.button("Logout"):
-        st.session_state.username = None
-        st.success("You have been logged out")
+    if st.session_state.get("username") is not None:
+        _logout_widget()